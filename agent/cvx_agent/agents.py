@@ -4,16 +4,28 @@ Supports build, extract, and advise actions using pydantic-ai.
 """
 import os
 import sys
-import json
-from typing import Any
+import re
+import random
+import time
+import asyncio
+import hashlib
+import tempfile
+import typing
+import functools
+import orjson
+from pathlib import Path
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from pydantic_ai import Agent
-from pydantic_ai.models.google import GoogleModel
-from pydantic_ai.models.openai import OpenAIModel
-from pydantic_ai.models.anthropic import AnthropicModel
-from pydantic_ai.models.groq import GroqModel
+from cvx_agent import batch, routing, semcache
+from cvx_agent.circuit_breaker import BREAKERS
+from cvx_agent.http import run_sync, shared_client
+from cvx_agent.rate_limit import estimate_tokens, rate_limited_run
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent
 
 load_dotenv()
 
@@ -22,6 +34,45 @@ load_dotenv()
 # ------------------------
 PRIMARY_MODEL = os.getenv("AI_MODEL", "gemini-2.5-flash")
 FALLBACK_MODEL = os.getenv("AI_FALLBACK_MODEL", "gemini-2.5-flash")
+# Per-request override of PRIMARY_MODEL, e.g. for daemon clients with their own AI_MODEL
+primary_model: ContextVar[str] = ContextVar("primary_model", default=PRIMARY_MODEL)
+MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+# Outside the working directory, which for cvx is the user's project repo
+CACHE_DIR = Path(
+    os.getenv("CVX_CACHE_DIR")
+    or Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "cvx" / "agent-output"
+)
+# Pretty-print cache files (for debugging)
+CACHE_INDENT = os.getenv("CVX_CACHE_INDENT") == "1"
+# Generate CV and letter with two concurrent agents instead of one
+SPLIT_BUILD = os.getenv("CVX_SPLIT_BUILD") == "1"
+# Build inputs estimated above this many tokens are trimmed before prompting
+MAX_PROMPT_TOKENS = int(os.getenv("CVX_MAX_PROMPT_TOKENS", "6000"))
+
+BUILD_SYSTEM_PROMPT = """You are a structured CV and letter generator.
+Input is a JSON object containing:
+  - job_posting
+  - current cv
+  - current letter
+Return ONLY JSON conforming to the Pydantic Model 'Model'.
+Do not include extra text or explanations."""
+
+BUILD_CV_SYSTEM_PROMPT = """You are a structured CV generator.
+Input is a JSON object containing:
+  - job_posting
+  - current cv
+Return ONLY JSON for the CV tailored to the job posting.
+Do not include extra text or explanations."""
+
+BUILD_LETTER_SYSTEM_PROMPT = """You are a structured cover letter generator.
+Input is a JSON object containing:
+  - job_posting
+  - current cv
+  - current letter
+Return ONLY JSON for the letter tailored to the job posting.
+Do not include extra text or explanations."""
 
 
 # ------------------------
@@ -40,45 +91,379 @@ class AdviseOutput(BaseModel):
 # ------------------------
 # Agent helper
 # ------------------------
+# Checked in order; the first pattern found in the lowercased model name wins
+_PROVIDER_PATTERNS = (
+    (re.compile(r"openai/|qwen/|llama|mixtral|groq"), "groq"),
+    (re.compile(r"gemini|flash|pro"), "google"),
+    (re.compile(r"claude|sonnet|opus|haiku"), "anthropic"),
+)
+
+
+@functools.lru_cache(maxsize=32)
+def get_provider(model_name: str) -> str:
+    """
+    Return the provider id ("groq", "google", "anthropic" or "openai") for a model name.
+    Unknown names default to OpenAI (works with any OpenAI-compatible API).
+    """
+    model_name_lower = model_name.lower()
+    for pattern, provider in _PROVIDER_PATTERNS:
+        if pattern.search(model_name_lower):
+            return provider
+    return "openai"
+
+
+def _model_classes(provider: str):
+    """
+    Return the (model class, provider class) pair for a provider id.
+    Imported on demand since each one pulls in its provider SDK.
+    """
+    if provider == "groq":
+        from pydantic_ai.models.groq import GroqModel
+        from pydantic_ai.providers.groq import GroqProvider
+        return GroqModel, GroqProvider
+    if provider == "google":
+        from pydantic_ai.models.google import GoogleModel
+        from pydantic_ai.providers.google import GoogleProvider
+        return GoogleModel, GoogleProvider
+    if provider == "anthropic":
+        from pydantic_ai.models.anthropic import AnthropicModel
+        from pydantic_ai.providers.anthropic import AnthropicProvider
+        return AnthropicModel, AnthropicProvider
+    from pydantic_ai.models.openai import OpenAIModel
+    from pydantic_ai.providers.openai import OpenAIProvider
+    return OpenAIModel, OpenAIProvider
+
+
+@functools.lru_cache(maxsize=32)
 def get_model(model_name: str):
     """
     Return a pydantic-ai model for a given model name.
     Supports Google, OpenAI, Anthropic, Groq, and any OpenAI-compatible API.
+    All models share one pooled HTTP client.
     """
-    model_name_lower = model_name.lower()
+    model_cls, provider_cls = _model_classes(get_provider(model_name))
+    return model_cls(model_name, provider=provider_cls(http_client=shared_client()))
+
+
+def _output_type(output_type_key: str):
+    """Resolve an output type key ("model", "cv", "letter", "dict" or "str") to its type."""
+    if output_type_key in ("model", "cv", "letter"):
+        # Import Model here to avoid circular imports and allow dynamic regeneration
+        from cvx_agent.models import Model
+        if output_type_key == "model":
+            return Model
+        # The type of Model.cv / Model.letter, without its Optional wrapper
+        annotation = Model.model_fields[output_type_key].annotation
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else annotation
+    return {"dict": dict, "str": str}[output_type_key]
+
+
+@functools.lru_cache(maxsize=64)
+def _build_agent(model_name: str, system_prompt: str, output_type_key: str) -> "Agent":
+    """
+    Return an Agent for a (model, system prompt, output type) combination.
+    Cached so the output schema is only prepared once per combination.
+    """
+    from pydantic_ai import Agent
 
-    # Check for Groq models (openai/, qwen/, llama, etc.)
-    if any(x in model_name_lower for x in ["openai/", "qwen/", "llama", "mixtral", "groq"]):
-        return GroqModel(model_name)
+    return Agent(
+        model=get_model(model_name),
+        system_prompt=system_prompt,
+        output_type=_output_type(output_type_key),
+    )
 
-    # Check for Gemini models
-    if any(x in model_name_lower for x in ["gemini", "flash", "pro"]):
-        return GoogleModel(model_name)
 
-    # Check for Claude models
-    if any(x in model_name_lower for x in ["claude", "sonnet", "opus", "haiku"]):
-        return AnthropicModel(model_name)
+def retry_after(exc: BaseException | None) -> float | None:
+    """Return the Retry-After delay in seconds carried by an exception or its cause, if any."""
+    while exc is not None:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is not None:
+            try:
+                return float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                return None
+        exc = exc.__cause__
+    return None
 
-    # Default to OpenAI (works with any OpenAI-compatible API)
-    return OpenAIModel(model_name)
 
+def backoff_delay(attempt: int, exc: BaseException | None = None) -> float | None:
+    """
+    Exponential backoff with full jitter, never shorter than the server's Retry-After.
+    Returns None if Retry-After exceeds RETRY_MAX_DELAY: the model should not be retried now.
+    """
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+    server_delay = retry_after(exc) if exc is not None else None
+    if server_delay is not None:
+        if server_delay > RETRY_MAX_DELAY:
+            return None
+        delay = max(delay, server_delay)
+    return delay
+
+
+def warmup(model_names: list[str] | None = None, *, split: bool = SPLIT_BUILD) -> None:
+    """
+    Prepare the build agents for the given models ahead of the first request.
+    Agent construction generates the output schema for Model, which is the
+    expensive part; _build_agent keeps the result for the rest of the process.
 
-def run_with_fallback(action_fn, max_retries: int = 2) -> Any:
-    """Run an action with primary and fallback models."""
-    for model_name in [PRIMARY_MODEL, FALLBACK_MODEL]:
+    model_names: models to warm (default: primary and fallback, for long-lived processes)
+    split: warm the CV and letter agents used by split builds instead of the single build agent
+    """
+    if model_names is None:
+        model_names = [primary_model.get(), FALLBACK_MODEL]
+    for model_name in dict.fromkeys(model_names):
+        try:
+            if split:
+                _build_agent(model_name, BUILD_CV_SYSTEM_PROMPT, "cv")
+                _build_agent(model_name, BUILD_LETTER_SYSTEM_PROMPT, "letter")
+            else:
+                _build_agent(model_name, BUILD_SYSTEM_PROMPT, "model")
+        except Exception as e:
+            # e.g. a missing API key; the request itself will report it
+            print(f"Warmup skipped for {model_name}: {e}", file=sys.stderr)
+
+
+async def run_with_fallback(action_fn, max_retries: int = 2) -> Any:
+    """
+    Run an async action with primary and fallback models.
+    The model with the best observed latency and load is tried first.
+    Models whose circuit breaker is open are skipped without a request.
+    """
+    for model_name in routing.order_models([primary_model.get(), FALLBACK_MODEL]):
+        breaker = BREAKERS[model_name]
         for attempt in range(max_retries):
+            if not breaker.allow():
+                print(f"Skipping {model_name}: circuit open after repeated failures", file=sys.stderr)
+                break
             try:
-                return action_fn(model_name)
+                with routing.track(model_name):
+                    result = await action_fn(model_name)
             except Exception as e:
+                breaker.record_failure()
                 print(f"Attempt {attempt+1} failed with {model_name}: {e}", file=sys.stderr)
+                if attempt + 1 < max_retries:
+                    delay = backoff_delay(attempt, e)
+                    if delay is None:
+                        # e.g. a quota that resets in hours: try the next model instead of waiting
+                        print(f"Skipping {model_name}: server asked to retry much later", file=sys.stderr)
+                        break
+                    await asyncio.sleep(delay)
+                continue
+            breaker.record_success()
+            return result
 
     raise RuntimeError("All AI attempts failed")
 
 
+# ------------------------
+# Output cache
+# ------------------------
+def hash_input(input_data: Any) -> str:
+    """Return a SHA-256 hex digest of the canonical JSON encoding of input_data."""
+    return hashlib.sha256(orjson.dumps(input_data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def load_cache(action: str, key: str) -> Any:
+    """Return the cached output for an action and key, or None on a miss."""
+    path = CACHE_DIR / action / f"{key}.json"
+    try:
+        return orjson.loads(path.read_bytes())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return None
+
+
+def save_cache(action: str, key: str, data: Any) -> None:
+    """
+    Write an action output to the cache.
+    Written to a temporary file and renamed, so readers never see a partial file.
+    """
+    path = CACHE_DIR / action / f"{key}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if CACHE_INDENT else None)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@functools.lru_cache(maxsize=8)
+def schema_hash(output_type: type[BaseModel]) -> str:
+    """Return a hash of an output model's JSON schema, cached per class (a reloaded Model is a new class)."""
+    return hash_input(output_type.model_json_schema())
+
+
+def cache_key(action: str, input_data: dict) -> str:
+    """
+    Return the cache key for an action input.
+    The key includes the primary model's provider so switching providers never reuses stale output.
+    Build keys also include the generated Model schema, since cvx regenerates it per project.
+    """
+    key_data = {"action": action, "model_family": get_provider(primary_model.get()), "input": input_data}
+    if action == "build":
+        key_data["schema"] = schema_hash(_output_type("model"))
+    return hash_input(key_data)
+
+
+SEMANTIC_CACHE = semcache.SemanticCache(CACHE_DIR / "semcache.json")
+# Left out of the semantic scope: a repost of the same job usually has a new URL.
+# On a match, the old value is replaced with the current one throughout the output.
+SEMANTIC_SCOPE_IGNORED = ("url",)
+
+
+def replace_value(obj: Any, old: str, new: str) -> Any:
+    """Return obj with every occurrence of old in its strings replaced by new."""
+    if isinstance(obj, str):
+        return obj.replace(old, new)
+    if isinstance(obj, dict):
+        return {k: replace_value(v, old, new) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [replace_value(v, old, new) for v in obj]
+    return obj
+
+
+async def run_cached(action: str, input_data: dict, action_fn, semantic_field: str | None = None) -> Any:
+    """
+    Return the cached output for input_data, or run action_fn with fallback and cache it.
+
+    If semantic_field is given and CVX_SEMCACHE=1, an exact miss falls back to a
+    similarity lookup on that field among inputs that agree on everything else.
+    """
+    key = cache_key(action, input_data)
+    cached = load_cache(action, key)
+    if cached is not None:
+        return cached
+
+    embedding = None
+    if semcache.ENABLED and semantic_field and input_data.get(semantic_field):
+        rest = {
+            k: v for k, v in input_data.items()
+            if k != semantic_field and k not in SEMANTIC_SCOPE_IGNORED
+        }
+        ignored = {k: input_data[k] for k in SEMANTIC_SCOPE_IGNORED if k in input_data}
+        scope = cache_key(action, rest)
+        try:
+            embedding = await semcache.embed(input_data[semantic_field])
+        except Exception as e:
+            print(f"Semantic cache disabled for this request: {e}", file=sys.stderr)
+        if embedding is not None:
+            match = SEMANTIC_CACHE.lookup(scope, embedding)
+            cached = load_cache(action, match["key"]) if match else None
+            if cached is not None:
+                # e.g. a "Job Posting URL" field filled from the old posting's URL
+                for field, old in match.get("fields", {}).items():
+                    new = ignored.get(field)
+                    if isinstance(old, str) and old and isinstance(new, str) and new != old:
+                        cached = replace_value(cached, old, new)
+                return cached
+
+    output = await run_with_fallback(action_fn)
+    save_cache(action, key, output)
+    if embedding is not None:
+        SEMANTIC_CACHE.insert(scope, key, embedding, ignored)
+    return output
+
+
 # ------------------------
 # Build action
 # ------------------------
-def build_cv_and_letter(input_data: dict) -> dict:
+# Limits applied to oversized build inputs
+MAX_EXPERIENCE_ENTRIES = 5
+MAX_HIGHLIGHTS = 3
+MAX_PROJECT_AGE_YEARS = 5
+
+_YEAR_RE = re.compile(r"\b(\d{4})\b")
+
+
+def _entry_end_year(entry: dict) -> int | None:
+    """Return the year an entry ended, or None if it is ongoing or undated."""
+    for field in ("end_date", "date", "start_date"):
+        value = entry.get(field)
+        if value == "present":
+            return None
+        if match := _YEAR_RE.search(str(value or "")):
+            return int(match.group(1))
+    return None
+
+
+def compress_build_input(input_data: dict, max_tokens: int = MAX_PROMPT_TOKENS) -> dict:
+    """
+    Trim low-signal CV sections when the input is estimated above max_tokens.
+
+    Keeps the most recent experience entries, shortens highlights and drops
+    projects that ended long ago. input_data is not modified, so cache keys
+    still hash the full input.
+    """
+    before = estimate_tokens(orjson.dumps(input_data))
+    cv = input_data.get("cv")
+    if before <= max_tokens or not isinstance(cv, dict):
+        return input_data
+
+    cv = orjson.loads(orjson.dumps(cv))
+    # rendercv nests entries under cv.sections; the generated CV model keeps them on cv
+    sections = cv.get("sections") if isinstance(cv.get("sections"), dict) else cv
+
+    if isinstance(sections.get("experience"), list):
+        sections["experience"] = sections["experience"][:MAX_EXPERIENCE_ENTRIES]
+    if isinstance(sections.get("projects"), list):
+        cutoff = time.localtime().tm_year - MAX_PROJECT_AGE_YEARS
+        sections["projects"] = [
+            project for project in sections["projects"]
+            if not isinstance(project, dict) or (_entry_end_year(project) or cutoff) >= cutoff
+        ]
+    for entries in sections.values():
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            if isinstance(entry, dict) and isinstance(entry.get("highlights"), list):
+                entry["highlights"] = entry["highlights"][:MAX_HIGHLIGHTS]
+
+    compressed = {**input_data, "cv": cv}
+    after = estimate_tokens(orjson.dumps(compressed))
+    print(f"Compressed build input from ~{before} to ~{after} tokens ({after / before:.0%})", file=sys.stderr)
+    return compressed
+
+
+def build_prompt(input_data: dict, output_name: str = "Model") -> str:
+    """Return the user prompt for the build action."""
+    return (
+        "Here is the structured input JSON:\n"
+        f"{orjson.dumps(input_data, option=orjson.OPT_SORT_KEYS).decode('utf-8')}\n\n"
+        f"Produce valid JSON output matching the Pydantic Model '{output_name}'."
+    )
+
+
+async def build_split(model_name: str, input_data: dict) -> dict:
+    """
+    Build CV and letter with two smaller agents running concurrently.
+    The CV agent only sees the job posting and current CV.
+
+    returns: dict with cv and letter, same shape as the single-agent build
+    """
+    provider = get_provider(model_name)
+    cv_agent = _build_agent(model_name, BUILD_CV_SYSTEM_PROMPT, "cv")
+    letter_agent = _build_agent(model_name, BUILD_LETTER_SYSTEM_PROMPT, "letter")
+
+    cv_input = {key: input_data.get(key) for key in ("job_posting", "cv")}
+    cv_prompt = build_prompt(cv_input, _output_type("cv").__name__)
+    letter_prompt = build_prompt(input_data, _output_type("letter").__name__)
+
+    cv_result, letter_result = await asyncio.gather(
+        rate_limited_run(provider, estimate_tokens(cv_prompt), lambda: cv_agent.run(user_prompt=cv_prompt)),
+        rate_limited_run(provider, estimate_tokens(letter_prompt), lambda: letter_agent.run(user_prompt=letter_prompt)),
+    )
+    return {
+        "cv": cv_result.output.model_dump(exclude_none=False),
+        "letter": letter_result.output.model_dump(exclude_none=False),
+    }
+
+
+async def build_cv_and_letter_async(input_data: dict, *, model_name: str | None = None) -> dict:
     """
     Build tailored CV and letter.
 
@@ -86,41 +471,81 @@ def build_cv_and_letter(input_data: dict) -> dict:
       - job_posting
       - cv (current cv data)
       - letter (current letter data)
+    model_name: primary model for this call instead of AI_MODEL (the fallback still applies)
 
     returns: dict with cv and letter
     """
-    # Import Model here to avoid circular imports and allow dynamic regeneration
-    from cvx_agent.models import Model
-
-    def do_build(model_name: str) -> dict:
-        model = get_model(model_name)
-        agent = Agent(
-            model=model,
-            system_prompt="""You are a structured CV and letter generator.
-Input is a JSON object containing:
-  - job_posting
-  - current cv
-  - current letter
-Return ONLY JSON conforming to the Pydantic Model 'Model'.
-Do not include extra text or explanations."""
+    if model_name is not None:
+        token = primary_model.set(model_name)
+        try:
+            return await build_cv_and_letter_async(input_data)
+        finally:
+            primary_model.reset(token)
+
+    # Compressed once per request on first use, not on a cache hit or per retry
+    prompt_input = functools.cache(lambda: compress_build_input(input_data))
+
+    async def do_build(model_name: str) -> dict:
+        if SPLIT_BUILD:
+            return await build_split(model_name, prompt_input())
+
+        agent = _build_agent(model_name, BUILD_SYSTEM_PROMPT, "model")
+        prompt = build_prompt(prompt_input())
+
+        result = await rate_limited_run(
+            get_provider(model_name),
+            estimate_tokens(prompt),
+            lambda: agent.run(user_prompt=prompt),
         )
+        return result.output.model_dump(exclude_none=False)
 
-        prompt = (
-            "Here is the structured input JSON:\n"
-            f"{json.dumps(input_data, indent=2)}\n\n"
-            "Produce valid JSON output matching the Pydantic Model 'Model'."
-        )
+    return await run_cached("build", input_data, do_build)
 
-        result = agent.run_sync(user_prompt=prompt, output_type=Model)
-        return result.output.model_dump(exclude_none=False)
 
-    return run_with_fallback(do_build)
+def build_cv_and_letter(input_data: dict, *, model_name: str | None = None) -> dict:
+    """Synchronous wrapper around build_cv_and_letter_async."""
+    return run_sync(build_cv_and_letter_async(input_data, model_name=model_name))
+
+
+async def build_cv_and_letter_stream(input_data: dict, on_partial) -> dict:
+    """
+    Build tailored CV and letter, streaming partial output.
+
+    on_partial is called with each partial dict as the model produces it.
+    Partial output from a failed attempt may be followed by output from a retry.
+    Always uses the single build agent, even with CVX_SPLIT_BUILD=1.
+
+    returns: dict with cv and letter (the final, validated output)
+    """
+    prompt_input = functools.cache(lambda: compress_build_input(input_data))
+
+    async def do_build_stream(model_name: str) -> dict:
+        agent = _build_agent(model_name, BUILD_SYSTEM_PROMPT, "model")
+        prompt = build_prompt(prompt_input())
+
+        async def stream() -> dict:
+            async with agent.run_stream(user_prompt=prompt) as result:
+                async for partial in result.stream_output():
+                    on_partial(partial.model_dump(exclude_none=False))
+                output = await result.get_output()
+            return output.model_dump(exclude_none=False)
+
+        return await rate_limited_run(get_provider(model_name), estimate_tokens(prompt), stream)
+
+    return await run_cached("build", input_data, do_build_stream)
 
 
 # ------------------------
 # Extract action (for add command)
 # ------------------------
-def extract_job(input_data: dict) -> dict:
+def extract_prompts(input_data: dict) -> tuple[str, str]:
+    """Return the (system prompt, user prompt) pair for the extract action."""
+    system_prompt = input_data.get("schema_prompt", "Extract job posting information as JSON.")
+    user_prompt = f"Job URL: {input_data.get('url', 'N/A')}\n\nJob posting:\n{input_data.get('job_text', '')}"
+    return system_prompt, user_prompt
+
+
+async def extract_job_async(input_data: dict) -> dict:
     """
     Extract job posting fields.
 
@@ -131,25 +556,70 @@ def extract_job(input_data: dict) -> dict:
 
     returns: dict with extracted fields
     """
-    def do_extract(model_name: str) -> dict:
-        model = get_model(model_name)
-        agent = Agent(
-            model=model,
-            system_prompt=input_data.get("schema_prompt", "Extract job posting information as JSON.")
+    async def do_extract(model_name: str) -> dict:
+        system_prompt, user_prompt = extract_prompts(input_data)
+        agent = _build_agent(model_name, system_prompt, "dict")
+
+        result = await rate_limited_run(
+            get_provider(model_name),
+            estimate_tokens(user_prompt),
+            lambda: agent.run(user_prompt=user_prompt),
         )
+        return result.output
 
-        user_prompt = f"Job URL: {input_data.get('url', 'N/A')}\n\nJob posting:\n{input_data.get('job_text', '')}"
+    return await run_cached("extract", input_data, do_extract, semantic_field="job_text")
 
-        result = agent.run_sync(user_prompt=user_prompt, output_type=dict)
-        return result.output
 
-    return run_with_fallback(do_extract)
+def extract_job(input_data: dict) -> dict:
+    """Synchronous wrapper around extract_job_async."""
+    return run_sync(extract_job_async(input_data))
+
+
+async def extract_job_batch_async(inputs: list[dict]) -> list[dict]:
+    """
+    Extract job posting fields for many postings at once.
+
+    Cache misses are sent through the primary model's provider batch API
+    (OpenAI Batch, Anthropic Message Batches) at reduced cost. Providers
+    without a batch API, and any request the batch could not complete,
+    fall back to concurrent extract_job_async calls.
+
+    inputs: list of extract inputs (see extract_job_async)
+
+    returns: list of dicts with extracted fields, in input order
+    """
+    results = [load_cache("extract", cache_key("extract", item)) for item in inputs]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    model_name = primary_model.get()
+    provider = get_provider(model_name)
+    if pending and provider in batch.BATCH_PROVIDERS:
+        try:
+            outputs = await batch.run_batch(provider, model_name, [extract_prompts(inputs[i]) for i in pending])
+        except Exception as e:
+            print(f"Batch API failed, extracting individually: {e}", file=sys.stderr)
+            outputs = [None] * len(pending)
+        for i, output in zip(pending, outputs):
+            if output is not None:
+                save_cache("extract", cache_key("extract", inputs[i]), output)
+                results[i] = output
+        pending = [i for i in pending if results[i] is None]
+
+    outputs = await gather_bounded([extract_job_async(inputs[i]) for i in pending])
+    for i, output in zip(pending, outputs):
+        results[i] = output
+    return results
+
+
+def extract_job_batch(inputs: list[dict]) -> list[dict]:
+    """Synchronous wrapper around extract_job_batch_async."""
+    return run_sync(extract_job_batch_async(inputs))
 
 
 # ------------------------
 # Advise action
 # ------------------------
-def advise_job_match(input_data: dict) -> dict:
+async def advise_job_match_async(input_data: dict) -> dict:
     """
     Analyze job-CV match and provide advice.
 
@@ -161,11 +631,11 @@ def advise_job_match(input_data: dict) -> dict:
 
     returns: dict with analysis
     """
-    def do_advise(model_name: str) -> dict:
-        model = get_model(model_name)
-        agent = Agent(
-            model=model,
-            system_prompt=input_data.get("workflow_prompt", "Analyze the job-CV match and provide strategic career advice.")
+    async def do_advise(model_name: str) -> dict:
+        agent = _build_agent(
+            model_name,
+            input_data.get("workflow_prompt", "Analyze the job-CV match and provide strategic career advice."),
+            "str",
         )
 
         user_parts = [f"## Job Posting\n{input_data.get('job_posting', '')}"]
@@ -176,31 +646,90 @@ def advise_job_match(input_data: dict) -> dict:
 
         user_prompt = "\n\n".join(user_parts)
 
-        result = agent.run_sync(user_prompt=user_prompt, output_type=str)
+        result = await rate_limited_run(
+            get_provider(model_name),
+            estimate_tokens(user_prompt),
+            lambda: agent.run(user_prompt=user_prompt),
+        )
         return {"analysis": result.output}
 
-    return run_with_fallback(do_advise)
+    return await run_cached("advise", input_data, do_advise, semantic_field="job_posting")
+
+
+def advise_job_match(input_data: dict) -> dict:
+    """Synchronous wrapper around advise_job_match_async."""
+    return run_sync(advise_job_match_async(input_data))
 
 
 # ------------------------
 # Main dispatcher
 # ------------------------
-def dispatch(input_data: dict) -> dict:
+async def dispatch_one(input_data: dict) -> dict:
     """
     Dispatch to the appropriate action based on input.
 
     input_data must contain an "action" field:
       - "build": build CV and letter
       - "extract": extract job posting fields
+      - "extract_batch": extract fields for each input in "items"
       - "advise": analyze job match
     """
     action = input_data.get("action", "build")
 
     if action == "build":
-        return build_cv_and_letter(input_data)
+        return await build_cv_and_letter_async(input_data)
     elif action == "extract":
-        return extract_job(input_data)
+        return await extract_job_async(input_data)
+    elif action == "extract_batch":
+        return {"results": await extract_job_batch_async(input_data.get("items", []))}
     elif action == "advise":
-        return advise_job_match(input_data)
+        return await advise_job_match_async(input_data)
     else:
         raise ValueError(f"Unknown action: {action}")
+
+
+async def gather_bounded(coros: list, max_concurrency: int = MAX_CONCURRENCY) -> list:
+    """
+    Await coroutines concurrently, at most max_concurrency at a time.
+    Results are returned in input order. If one fails, the others are
+    cancelled (so no provider calls are spent on results nobody reads)
+    and its exception is raised.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(coro):
+        async with semaphore:
+            return await coro
+
+    tasks = [asyncio.ensure_future(run_one(coro)) for coro in coros]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # items still waiting on the semaphore never started
+        for coro in coros:
+            coro.close()
+        raise
+
+
+async def dispatch_async(items: list[dict], max_concurrency: int = MAX_CONCURRENCY) -> list[dict]:
+    """
+    Dispatch a batch of inputs concurrently.
+
+    At most max_concurrency requests are in flight at once.
+    Results are returned in input order.
+    """
+    return await gather_bounded([dispatch_one(item) for item in items], max_concurrency)
+
+
+def dispatch(input_data: dict | list[dict]) -> dict | list[dict]:
+    """
+    Dispatch a single input or a batch of inputs.
+
+    A dict returns a single result; a list returns one result per item.
+    """
+    if isinstance(input_data, list):
+        return run_sync(dispatch_async(input_data))
+    return run_sync(dispatch_one(input_data))
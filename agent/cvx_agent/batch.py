@@ -0,0 +1,154 @@
+"""
+Provider batch APIs for bulk requests.
+
+OpenAI Batch and Anthropic Message Batches process requests
+asynchronously at about half the price of the regular endpoints.
+Results can take from minutes up to 24 hours, so batches are only used
+for explicit batch actions where latency does not matter. A batch still
+running after CVX_BATCH_TIMEOUT seconds is cancelled.
+"""
+import asyncio
+import os
+import re
+import sys
+import time
+
+import orjson
+
+from cvx_agent.http import shared_client
+
+# Providers with a batch endpoint
+BATCH_PROVIDERS = ("openai", "anthropic")
+POLL_INTERVAL = 30.0
+BATCH_TIMEOUT = float(os.getenv("CVX_BATCH_TIMEOUT", "3600"))
+MAX_TOKENS = 4096
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def parse_json_output(text: str) -> dict:
+    """Parse a JSON object from model text, tolerating a Markdown code fence."""
+    return orjson.loads(_FENCE_RE.sub("", text.strip()))
+
+
+def openai_results(output: str, count: int) -> list[dict | None]:
+    """Map an OpenAI batch output file (JSONL) to outputs in request order, None where a request failed."""
+    results: list[dict | None] = [None] * count
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        entry = orjson.loads(line)
+        response = entry.get("response") or {}
+        if response.get("status_code") != 200:
+            print(f"Batch request {entry.get('custom_id')} failed: {entry.get('error')}", file=sys.stderr)
+            continue
+        try:
+            text = response["body"]["choices"][0]["message"]["content"]
+            results[int(entry["custom_id"])] = parse_json_output(text)
+        except (KeyError, IndexError, ValueError) as e:
+            print(f"Batch request {entry.get('custom_id')} returned invalid output: {e}", file=sys.stderr)
+    return results
+
+
+async def run_openai_batch(model_name: str, prompts: list[tuple[str, str]]) -> list[dict | None]:
+    """Run (system_prompt, user_prompt) pairs through the OpenAI Batch API."""
+    from openai import AsyncOpenAI
+
+    client = AsyncOpenAI(http_client=shared_client())
+    lines = [
+        orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model_name,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                "response_format": {"type": "json_object"},
+            },
+        })
+        for i, (system_prompt, user_prompt) in enumerate(prompts)
+    ]
+    input_file = await client.files.create(
+        file=("batch.jsonl", b"\n".join(lines)),
+        purpose="batch",
+    )
+    job = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while job.status not in ("completed", "failed", "expired", "cancelled"):
+        if time.monotonic() >= deadline:
+            await client.batches.cancel(job.id)
+            raise TimeoutError(f"OpenAI batch {job.id} still {job.status} after {BATCH_TIMEOUT:.0f}s, cancelled")
+        await asyncio.sleep(POLL_INTERVAL)
+        job = await client.batches.retrieve(job.id)
+        counts = job.request_counts
+        done = f" ({counts.completed + counts.failed}/{counts.total})" if counts else ""
+        print(f"OpenAI batch {job.id}: {job.status}{done}", file=sys.stderr)
+
+    if job.output_file_id is None:
+        raise RuntimeError(f"OpenAI batch {job.id} ended with status {job.status}")
+
+    content = await client.files.content(job.output_file_id)
+    return openai_results(content.text, len(prompts))
+
+
+async def run_anthropic_batch(model_name: str, prompts: list[tuple[str, str]]) -> list[dict | None]:
+    """Run (system_prompt, user_prompt) pairs through Anthropic Message Batches."""
+    from anthropic import AsyncAnthropic
+
+    client = AsyncAnthropic(http_client=shared_client())
+    job = await client.messages.batches.create(
+        requests=[
+            {
+                "custom_id": str(i),
+                "params": {
+                    "model": model_name,
+                    "max_tokens": MAX_TOKENS,
+                    "system": system_prompt + "\nRespond with a single JSON object only.",
+                    "messages": [{"role": "user", "content": user_prompt}],
+                },
+            }
+            for i, (system_prompt, user_prompt) in enumerate(prompts)
+        ]
+    )
+
+    deadline = time.monotonic() + BATCH_TIMEOUT
+    while job.processing_status != "ended":
+        if time.monotonic() >= deadline:
+            await client.messages.batches.cancel(job.id)
+            raise TimeoutError(f"Anthropic batch {job.id} still running after {BATCH_TIMEOUT:.0f}s, cancelled")
+        await asyncio.sleep(POLL_INTERVAL)
+        job = await client.messages.batches.retrieve(job.id)
+        counts = job.request_counts
+        print(f"Anthropic batch {job.id}: {job.processing_status} ({counts.processing} processing)", file=sys.stderr)
+
+    results: list[dict | None] = [None] * len(prompts)
+    async for entry in await client.messages.batches.results(job.id):
+        if entry.result.type != "succeeded":
+            print(f"Batch request {entry.custom_id} {entry.result.type}", file=sys.stderr)
+            continue
+        try:
+            text = "".join(block.text for block in entry.result.message.content if block.type == "text")
+            results[int(entry.custom_id)] = parse_json_output(text)
+        except ValueError as e:
+            print(f"Batch request {entry.custom_id} returned invalid output: {e}", file=sys.stderr)
+    return results
+
+
+async def run_batch(provider: str, model_name: str, prompts: list[tuple[str, str]]) -> list[dict | None]:
+    """
+    Run prompts through the provider's batch API.
+    Returns one output per prompt, in order, with None for requests that failed.
+    """
+    if provider == "openai":
+        return await run_openai_batch(model_name, prompts)
+    if provider == "anthropic":
+        return await run_anthropic_batch(model_name, prompts)
+    raise ValueError(f"No batch API for provider: {provider}")
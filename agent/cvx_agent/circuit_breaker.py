@@ -0,0 +1,64 @@
+"""
+Circuit breaker per model.
+
+After repeated failures a model is skipped for a cool-down period, so
+requests go straight to the fallback instead of retrying a provider that
+is known to be down.
+"""
+import threading
+import time
+from collections import defaultdict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Classic CLOSED -> OPEN -> HALF_OPEN breaker.
+
+    The circuit opens after fail_threshold consecutive failures. Once
+    reset_timeout seconds have passed a single trial call is let through;
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, fail_threshold: int = 3, reset_timeout: float = 30.0):
+        self.fail_threshold = fail_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return whether a call may be attempted now."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.fail_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+# One breaker per model name
+BREAKERS: defaultdict[str, CircuitBreaker] = defaultdict(CircuitBreaker)
@@ -0,0 +1,183 @@
+"""
+Long-lived agent daemon over a Unix socket.
+
+Running the agent as a subprocess pays Python startup, pydantic-ai imports
+and fresh TLS connections on every call. `cvx-agent start` keeps one
+process with warm agents and connections; cvx sends requests over the
+socket and falls back to the subprocess when no daemon is listening.
+
+Each message is a 4-byte big-endian length followed by that many bytes
+of JSON. A client sends one request and reads one response:
+
+  request:  {"input": {...} or [...], "model": "<AI_MODEL>"}  (model optional)
+            {"command": "status"} or {"command": "stop"}
+  response: {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+
+The daemon uses the API keys from the environment it was started in.
+"""
+import asyncio
+import importlib
+import os
+import signal
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+SOCKET_PATH = Path(
+    os.getenv("CVX_AGENT_SOCKET")
+    or Path(os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()) / "cvx-agent.sock"
+)
+
+_HEADER = struct.Struct(">I")
+
+
+async def read_message(reader: asyncio.StreamReader) -> Any:
+    """Read one length-prefixed JSON message."""
+    (length,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return orjson.loads(await reader.readexactly(length))
+
+
+async def write_message(writer: asyncio.StreamWriter, obj: Any) -> None:
+    """Write one length-prefixed JSON message."""
+    payload = orjson.dumps(obj)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def send_request(request: dict, path: Path = SOCKET_PATH) -> dict:
+    """Send one request to the daemon and return its response."""
+    reader, writer = await asyncio.open_unix_connection(str(path))
+    try:
+        await write_message(writer, request)
+        return await read_message(reader)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+class Daemon:
+    """Serves agent requests on a Unix socket until stopped."""
+
+    def __init__(self, path: Path = SOCKET_PATH):
+        self.path = path
+        self.stopped = asyncio.Event()
+        self._models_mtime: float | None = None
+
+    def _refresh_models(self) -> None:
+        """Reload the generated Model if cvx regenerated models.py for a new schema."""
+        from cvx_agent import agents, models
+
+        mtime = os.stat(models.__file__).st_mtime
+        if self._models_mtime is not None and mtime != self._models_mtime:
+            importlib.reload(models)
+            agents._build_agent.cache_clear()
+        self._models_mtime = mtime
+
+    async def handle_request(self, request: dict) -> dict:
+        from cvx_agent import agents
+
+        command = request.get("command")
+        if command == "status":
+            return {"ok": True, "result": {"pid": os.getpid(), "socket": str(self.path)}}
+        if command == "stop":
+            # the server shuts down once this response is written
+            return {"ok": True, "result": None}
+        if command is not None:
+            raise ValueError(f"Unknown command: {command}")
+
+        self._refresh_models()
+        # Each connection runs in its own task, so this only affects this request
+        if request.get("model"):
+            agents.primary_model.set(request["model"])
+
+        input_data = request.get("input")
+        if isinstance(input_data, list):
+            result = await agents.dispatch_async(input_data)
+        else:
+            result = await agents.dispatch_one(input_data)
+        return {"ok": True, "result": result}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_message(reader)
+            try:
+                response = await self.handle_request(request)
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                response = {"ok": False, "error": str(e)}
+            await write_message(writer, response)
+            if isinstance(request, dict) and request.get("command") == "stop":
+                self.stopped.set()
+        except (asyncio.IncompleteReadError, ConnectionError, orjson.JSONDecodeError):
+            # client went away or sent garbage; nothing to answer
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        from cvx_agent import agents
+        from cvx_agent.http import shared_client
+
+        if self.path.exists():
+            try:
+                await send_request({"command": "status"}, self.path)
+                raise RuntimeError(f"cvx-agent is already running on {self.path}")
+            except (ConnectionError, FileNotFoundError):
+                # stale socket from a daemon that did not shut down cleanly
+                self.path.unlink()
+
+        # Record the models.py in use, so a schema regenerated after startup is
+        # picked up by the first request; then preload agents and the HTTP client
+        self._refresh_models()
+        agents.warmup()
+        client = shared_client()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopped.set)
+
+        server = await asyncio.start_unix_server(self.handle_connection, path=str(self.path))
+        os.chmod(self.path, 0o600)
+        print(f"cvx-agent listening on {self.path}", file=sys.stderr)
+        try:
+            async with server:
+                await self.stopped.wait()
+        finally:
+            self.path.unlink(missing_ok=True)
+            await client.aclose()
+
+
+def start() -> int:
+    """Run the daemon in the foreground until stopped."""
+    try:
+        asyncio.run(Daemon().serve())
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def stop() -> int:
+    """Ask a running daemon to shut down."""
+    try:
+        asyncio.run(send_request({"command": "stop"}))
+    except (ConnectionError, FileNotFoundError):
+        print("cvx-agent is not running", file=sys.stderr)
+        return 1
+    print("cvx-agent stopped", file=sys.stderr)
+    return 0
+
+
+def status() -> int:
+    """Report whether a daemon is running; exit status 0 if it is."""
+    try:
+        response = asyncio.run(send_request({"command": "status"}))
+    except (ConnectionError, FileNotFoundError):
+        print("cvx-agent is not running", file=sys.stderr)
+        return 1
+    print(f"cvx-agent is running (pid {response['result']['pid']}) on {SOCKET_PATH}")
+    return 0
@@ -0,0 +1,61 @@
+"""
+Shared HTTP client for all AI providers.
+
+One pooled httpx.AsyncClient is reused by every model so keep-alive
+connections (and TLS sessions) survive across requests and actions.
+Pooled connections belong to the event loop that opened them, so the
+synchronous entry points all run on one process-wide loop (run_sync).
+"""
+import asyncio
+import atexit
+import functools
+from typing import Any, Coroutine, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+@functools.cache
+def shared_client() -> httpx.AsyncClient:
+    """
+    Return the process-wide AsyncClient, creating it on first use.
+    Its connections are bound to one event loop: use it from run_sync or
+    from a single long-lived loop such as the daemon's.
+    """
+    return httpx.AsyncClient(
+        # Concurrent requests to one provider share a multiplexed connection
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+        # Long read timeout: a full CV + letter generation can take minutes
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    )
+
+
+@functools.cache
+def event_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop used by run_sync, creating it on first use."""
+    return asyncio.new_event_loop()
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion on the process-wide event loop.
+    Unlike asyncio.run, the loop stays open between calls, so connections
+    pooled by the shared client can be reused by the next call.
+    """
+    return event_loop().run_until_complete(coro)
+
+
+def _close_shared_client() -> None:
+    # Only the process-wide loop is ours to clean up; a client used from
+    # another loop (e.g. the daemon's) is closed by whoever owns that loop
+    if event_loop.cache_info().currsize == 0:
+        return
+    loop = event_loop()
+    if shared_client.cache_info().currsize and not shared_client().is_closed:
+        loop.run_until_complete(shared_client().aclose())
+    loop.close()
+
+
+atexit.register(_close_shared_client)
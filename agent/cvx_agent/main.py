@@ -1,19 +1,79 @@
 """Entry point for running cvx_agent as a module."""
 import sys
-import json
-from cvx_agent.agents import dispatch
+import orjson
+import argparse
+
+
+def read_input() -> dict | list[dict]:
+    """Read and validate the request JSON from stdin (an object or an array of objects)."""
+    input_json = orjson.loads(sys.stdin.buffer.read())
+    items = input_json if isinstance(input_json, list) else [input_json]
+    if not all(isinstance(item, dict) for item in items):
+        raise ValueError("input must be a JSON object or an array of objects")
+    return input_json
+
+
+def write_line(obj: dict) -> None:
+    """Write one NDJSON line to stdout and flush it."""
+    sys.stdout.buffer.write(orjson.dumps(obj) + b"\n")
+    sys.stdout.buffer.flush()
 
 
 def main():
+    parser = argparse.ArgumentParser(prog="cvx-agent")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["start", "stop", "status"],
+        help="manage the agent daemon; without a command, handle one request from stdin",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help='stream build output as NDJSON: {"partial": ...} lines, then one {"final": ...} line',
+    )
+    args = parser.parse_args()
+
+    if args.command:
+        from cvx_agent import daemon
+        sys.exit(getattr(daemon, args.command)())
+
     try:
-        # read input JSON from stdin
-        input_json = json.load(sys.stdin)
+        # read input JSON from stdin; malformed input fails here, before any heavy import
+        input_json = read_input()
+        if args.stream and (isinstance(input_json, list) or input_json.get("action", "build") != "build"):
+            raise ValueError("--stream only supports a single build request")
+
+        # imported only once the input is known to be valid: this pulls in pydantic-ai
+        from cvx_agent.agents import (
+            SPLIT_BUILD, build_cv_and_letter_stream, dispatch_async, dispatch_one, primary_model, warmup,
+        )
+        from cvx_agent.http import run_sync
+
+        # build the output schema for build requests before any request is in flight;
+        # only the primary model: the fallback is prepared if and when it is needed
+        items = input_json if isinstance(input_json, list) else [input_json]
+        if any(item.get("action", "build") == "build" for item in items):
+            warmup([primary_model.get()], split=SPLIT_BUILD and not args.stream)
+
+        # stream partial output for a single build request
+        if args.stream:
+            if SPLIT_BUILD:
+                print("CVX_SPLIT_BUILD is ignored with --stream", file=sys.stderr)
+            output = run_sync(
+                build_cv_and_letter_stream(input_json, lambda partial: write_line({"partial": partial}))
+            )
+            write_line({"final": output})
+            return
 
-        # dispatch to appropriate action
-        output = dispatch(input_json)
+        # dispatch to appropriate action; arrays are processed concurrently
+        if isinstance(input_json, list):
+            output = run_sync(dispatch_async(input_json))
+        else:
+            output = run_sync(dispatch_one(input_json))
 
         # write result JSON to stdout
-        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.buffer.write(orjson.dumps(output))
 
     except Exception as e:
         # fail fast
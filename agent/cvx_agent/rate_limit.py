@@ -0,0 +1,97 @@
+"""
+Client-side rate limiting per AI provider.
+
+Requests are paced with a token bucket per provider so we stay under the
+published RPM/TPM quotas instead of bouncing off 429 responses.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+
+class TokenBucket:
+    """
+    Token bucket tracking requests per minute and tokens per minute.
+
+    The request rate adapts with AIMD: it is halved whenever the provider
+    answers 429 and grows back by one request per minute on each success.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.max_rpm = float(rpm)
+        self.rpm = float(rpm)
+        self.tpm = float(tpm)
+        self.requests_available = float(rpm)
+        self.tokens_available = float(tpm)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.last_refill
+        self.requests_available = min(self.rpm, self.requests_available + elapsed * self.rpm / 60)
+        self.tokens_available = min(self.tpm, self.tokens_available + elapsed * self.tpm / 60)
+        self.last_refill = now
+
+    def try_acquire(self, requests: int = 1, tokens: int = 0) -> float:
+        """Take capacity if available and return 0, else return seconds to wait."""
+        # A single prompt larger than the whole bucket would otherwise never fit
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.requests_available >= requests and self.tokens_available >= tokens:
+                self.requests_available -= requests
+                self.tokens_available -= tokens
+                return 0.0
+            request_wait = max(0.0, requests - self.requests_available) * 60 / self.rpm
+            token_wait = max(0.0, tokens - self.tokens_available) * 60 / self.tpm
+            return max(request_wait, token_wait)
+
+    async def acquire(self, requests: int = 1, tokens: int = 0) -> None:
+        """Wait until the bucket has capacity, then take it."""
+        while (wait := self.try_acquire(requests, tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """Additive increase of the request rate."""
+        with self._lock:
+            self.rpm = min(self.max_rpm, self.rpm + 1)
+
+    def on_rate_limited(self) -> None:
+        """Multiplicative decrease of the request rate."""
+        with self._lock:
+            self.rpm = max(1.0, self.rpm * 0.5)
+            self.requests_available = min(self.requests_available, self.rpm)
+
+
+# Published default-tier quotas per provider (requests/min, tokens/min)
+BUCKETS: dict[str, TokenBucket] = {
+    "anthropic": TokenBucket(50, 80_000),
+    "google": TokenBucket(60, 100_000),
+    "openai": TokenBucket(500, 200_000),
+    "groq": TokenBucket(30, 60_000),
+}
+
+
+def estimate_tokens(text: str | bytes) -> int:
+    """Rough token estimate (~4 characters, or bytes of encoded JSON, per token)."""
+    return len(text) // 4
+
+
+async def rate_limited_run(provider: str, est_tokens: int, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Await fn() once the provider's bucket has capacity for est_tokens."""
+    from pydantic_ai.exceptions import ModelHTTPError
+
+    bucket = BUCKETS.get(provider)
+    if bucket is None:
+        return await fn()
+
+    await bucket.acquire(1, est_tokens)
+    try:
+        result = await fn()
+    except ModelHTTPError as e:
+        if e.status_code == 429:
+            bucket.on_rate_limited()
+        raise
+    bucket.on_success()
+    return result
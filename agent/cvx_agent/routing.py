@@ -0,0 +1,63 @@
+"""
+Latency-aware ordering of candidate models.
+
+Per-model stats (EWMA latency, in-flight requests, consecutive failures)
+decide which of the primary and fallback models is tried first, so a
+consistently faster fallback is preferred over a slow primary.
+"""
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# Weight of the newest sample in the latency EWMA
+EWMA_ALPHA = 0.2
+
+
+@dataclass
+class ModelStats:
+    ewma_latency_ms: float = 0.0
+    samples: int = 0
+    inflight: int = 0
+    consecutive_failures: int = 0
+
+    def score(self) -> float:
+        """Lower is better."""
+        return self.ewma_latency_ms * (1 + self.inflight) * (1 + self.consecutive_failures)
+
+
+STATS: defaultdict[str, ModelStats] = defaultdict(ModelStats)
+
+
+def order_models(model_names: list[str]) -> list[str]:
+    """
+    Order candidate models by score, best first.
+    Until every candidate has a latency sample the configured order is kept,
+    so an unmeasured model never jumps ahead of the primary.
+    """
+    if not all(STATS[name].samples for name in model_names):
+        return list(model_names)
+    return sorted(model_names, key=lambda name: STATS[name].score())
+
+
+@contextmanager
+def track(model_name: str):
+    """Record in-flight count, latency and failures for one call to a model."""
+    stats = STATS[model_name]
+    stats.inflight += 1
+    t0 = time.monotonic()
+    try:
+        yield
+    except BaseException:
+        stats.consecutive_failures += 1
+        raise
+    else:
+        latency_ms = (time.monotonic() - t0) * 1000
+        if stats.samples:
+            stats.ewma_latency_ms = (1 - EWMA_ALPHA) * stats.ewma_latency_ms + EWMA_ALPHA * latency_ms
+        else:
+            stats.ewma_latency_ms = latency_ms
+        stats.samples += 1
+        stats.consecutive_failures = 0
+    finally:
+        stats.inflight -= 1
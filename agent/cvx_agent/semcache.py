@@ -0,0 +1,101 @@
+"""
+Semantic cache for near-duplicate inputs.
+
+The exact-hash cache misses reposts of the same job with tiny edits
+(whitespace, punctuation, boilerplate). When enabled with CVX_SEMCACHE=1,
+the free-text part of an input is embedded and a cached output is reused
+if a previous input in the same scope is similar enough (cosine similarity).
+"""
+import math
+import os
+import tempfile
+from pathlib import Path
+
+import orjson
+
+ENABLED = os.getenv("CVX_SEMCACHE") == "1"
+EMBEDDING_MODEL = os.getenv("CVX_SEMCACHE_MODEL", "openai:text-embedding-3-small")
+THRESHOLD = float(os.getenv("CVX_SEMCACHE_THRESHOLD", "0.97"))
+
+_embedder = None
+
+
+async def embed(text: str) -> list[float]:
+    """Return the unit-length embedding of text."""
+    global _embedder
+    if _embedder is None:
+        from pydantic_ai.embeddings import Embedder
+        _embedder = Embedder(EMBEDDING_MODEL)
+
+    result = await _embedder.embed_query(text)
+    vector = list(result.embeddings[0])
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class SemanticCache:
+    """
+    Index of (scope, cache key, embedding) entries persisted as JSON.
+
+    scope is a hash of the non-fuzzy part of an input, so only inputs that
+    agree on everything except the embedded text can match each other.
+    """
+
+    def __init__(self, path: Path, threshold: float = THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self._entries: list[dict] = []
+        # (inode, mtime) of the file last read; every write replaces the inode
+        self._version: tuple[int, int] | None = None
+
+    @property
+    def entries(self) -> list[dict]:
+        """The index, re-read whenever another process has rewritten the file."""
+        try:
+            st = self.path.stat()
+            version = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            version = None
+        if version != self._version:
+            try:
+                self._entries = orjson.loads(self.path.read_bytes())
+            except (FileNotFoundError, orjson.JSONDecodeError):
+                self._entries = []
+            self._version = version
+        return self._entries
+
+    def lookup(self, scope: str, embedding: list[float]) -> dict | None:
+        """
+        Return the most similar entry above the threshold, or None.
+        An entry has the cache "key" and the "fields" stored with it.
+        """
+        best_entry, best_score = None, self.threshold
+        for entry in self.entries:
+            if entry["scope"] != scope:
+                continue
+            # Embeddings are unit length, so the dot product is the cosine similarity
+            score = sum(a * b for a, b in zip(embedding, entry["embedding"]))
+            if score >= best_score:
+                best_entry, best_score = entry, score
+        return best_entry
+
+    def insert(self, scope: str, key: str, embedding: list[float], fields: dict | None = None) -> None:
+        """
+        Add an entry and persist the index.
+        fields holds input values left out of the scope, so a match can tell what differed.
+        Written to a temporary file and renamed, like the output cache, so
+        readers never see a partial index.
+        """
+        entry = {"scope": scope, "key": key, "embedding": embedding, "fields": fields or {}}
+        entries = [*self.entries, entry]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(entries))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        st = self.path.stat()
+        self._entries, self._version = entries, (st.st_ino, st.st_mtime_ns)
@@ -1,7 +1,7 @@
 """Tests for the CVX agent."""
 import json
 import pytest
-from cvx_agent.agents import build_cv_and_letter, hash_input
+from cvx_agent.agents import backoff_delay, build_cv_and_letter, dispatch, hash_input
 
 
 @pytest.fixture
@@ -77,7 +77,7 @@ def test_build_cv_and_letter_structure(sample_input):
 
 def test_build_cv_and_letter_caching(sample_input):
     """Test that caching works correctly."""
-    # The agent uses .cache directory by default
+    # The agent caches outputs under ~/.cache/cvx/agent-output by default
     # First call - should hit AI or cache
     result1 = build_cv_and_letter(sample_input)
 
@@ -119,18 +119,9 @@ def test_build_cv_and_letter_with_missing_letter(sample_input):
         "claude-haiku-4-5-20251001",
     ],
 )
-def test_build_with_different_models(sample_input, model_name, monkeypatch):
+def test_build_with_different_models(sample_input, model_name):
     """Test that different models work."""
-    monkeypatch.setenv("AI_MODEL", model_name)
-
-    # Re-import to pick up new env var
-    import importlib
-    import cvx_agent.agents
-
-    importlib.reload(cvx_agent.agents)
-    from cvx_agent.agents import build_cv_and_letter as build_func
-
-    result = build_func(sample_input)
+    result = build_cv_and_letter(sample_input, model_name=model_name)
     assert "cv" in result
     assert "letter" in result
 
@@ -159,3 +150,327 @@ def test_input_validation():
     assert "letter" in result
     assert isinstance(result["cv"], dict)
     assert isinstance(result["letter"], dict)
+
+
+def test_dispatch_batch_preserves_order(sample_input):
+    """Test that a batch dispatch returns one result per input, in order."""
+    items = [
+        dict(sample_input, action="build"),
+        {"action": "advise", "job_posting": sample_input["job_posting"]},
+    ]
+
+    results = dispatch(items)
+
+    assert isinstance(results, list)
+    assert len(results) == 2
+    assert "cv" in results[0] and "letter" in results[0]
+    assert "analysis" in results[1]
+
+
+def test_token_bucket_paces_and_backs_off():
+    """Test that the token bucket refuses work beyond capacity and halves on 429."""
+    from cvx_agent.rate_limit import TokenBucket
+
+    bucket = TokenBucket(rpm=2, tpm=1000)
+    assert bucket.try_acquire(1, 100) == 0
+    assert bucket.try_acquire(1, 100) == 0
+    assert bucket.try_acquire(1, 100) > 0
+
+    bucket.on_rate_limited()
+    assert bucket.rpm == 1
+    bucket.on_success()
+    assert bucket.rpm == 2
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test that the breaker opens after repeated failures and half-opens after the timeout."""
+    from cvx_agent.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(fail_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    breaker.reset_timeout = 0
+    assert breaker.allow()  # half-open trial
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record_success()
+    assert breaker.allow()
+
+
+def test_backoff_delay_honors_retry_after():
+    """Test that backoff is jittered within the cap and respects a bounded Retry-After."""
+    import httpx
+
+    for attempt in range(10):
+        assert 0 <= backoff_delay(attempt) <= 20.0
+
+    error = RuntimeError("rate limited")
+    error.__cause__ = httpx.HTTPStatusError(
+        "429",
+        request=httpx.Request("POST", "https://example.com"),
+        response=httpx.Response(429, headers={"retry-after": "7"}),
+    )
+    assert backoff_delay(0, error) >= 7.0
+
+    # A Retry-After beyond the cap means: move on to the next model
+    error.__cause__.response.headers["retry-after"] = "3600"
+    assert backoff_delay(0, error) is None
+
+
+def test_order_models_prefers_faster_model():
+    """Test that routing keeps the configured order until both models are measured."""
+    from cvx_agent import routing
+
+    routing.STATS.clear()
+    assert routing.order_models(["slow", "fast"]) == ["slow", "fast"]
+
+    routing.STATS["slow"].ewma_latency_ms, routing.STATS["slow"].samples = 9000.0, 1
+    assert routing.order_models(["slow", "fast"]) == ["slow", "fast"]
+
+    routing.STATS["fast"].ewma_latency_ms, routing.STATS["fast"].samples = 1000.0, 1
+    assert routing.order_models(["slow", "fast"]) == ["fast", "slow"]
+    routing.STATS.clear()
+
+
+def test_compress_build_input_trims_large_cv(sample_input):
+    """Test that oversized build inputs are trimmed without touching the original."""
+    from cvx_agent.agents import compress_build_input
+
+    entry = sample_input["cv"]["sections"]["experience"][0]
+    entry["highlights"] = [f"Highlight {i}" for i in range(10)]
+    sample_input["cv"]["sections"]["experience"] = [dict(entry) for _ in range(8)]
+    sample_input["cv"]["sections"]["projects"] = [
+        {"name": "Old", "start_date": "2001-01", "end_date": "2003-06"},
+        {"name": "Ongoing", "start_date": "2015-01", "end_date": "present"},
+    ]
+
+    assert compress_build_input(sample_input, max_tokens=100_000) is sample_input
+
+    compressed = compress_build_input(sample_input, max_tokens=10)
+    sections = compressed["cv"]["sections"]
+    assert len(sections["experience"]) == 5
+    assert all(len(e["highlights"]) == 3 for e in sections["experience"])
+    assert [p["name"] for p in sections["projects"]] == ["Ongoing"]
+    assert len(sample_input["cv"]["sections"]["experience"]) == 8
+
+
+def test_run_sync_reuses_event_loop():
+    """Test that sync entry points share one loop, so pooled connections stay usable."""
+    import asyncio
+    from cvx_agent.http import run_sync
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = run_sync(current_loop())
+    assert run_sync(current_loop()) is first
+    assert not first.is_closed()
+
+
+def test_build_cache_key_tracks_model_schema(sample_input, monkeypatch):
+    """Test that a regenerated Model schema invalidates cached build output."""
+    from pydantic import BaseModel
+    from cvx_agent import models
+    from cvx_agent.agents import cache_key
+
+    before = cache_key("build", sample_input)
+    assert cache_key("build", sample_input) == before
+
+    class Model(BaseModel):
+        cv: dict | None = None
+
+    monkeypatch.setattr(models, "Model", Model)
+    assert cache_key("build", sample_input) != before
+
+
+def test_semantic_cache_matches_within_scope(tmp_path):
+    """Test that semantic lookups only match similar entries from the same scope."""
+    from cvx_agent.semcache import SemanticCache
+
+    cache = SemanticCache(tmp_path / "semcache.json", threshold=0.9)
+    cache.insert("scope-a", "key-a", [1.0, 0.0], {"url": "https://old"})
+
+    assert cache.lookup("scope-a", [0.99, 0.141]) == {
+        "scope": "scope-a", "key": "key-a", "embedding": [1.0, 0.0], "fields": {"url": "https://old"},
+    }
+    assert cache.lookup("scope-a", [0.0, 1.0]) is None
+    assert cache.lookup("scope-b", [1.0, 0.0]) is None
+
+    # Entries written by another process are kept and visible
+    other = SemanticCache(tmp_path / "semcache.json", threshold=0.9)
+    other.insert("scope-b", "key-b", [0.0, 1.0])
+    assert cache.lookup("scope-b", [0.0, 1.0])["key"] == "key-b"
+    assert cache.lookup("scope-a", [1.0, 0.0])["key"] == "key-a"
+
+
+def test_semantic_hit_uses_current_url(tmp_path, monkeypatch):
+    """Test that a semantic hit on a repost reports the repost's URL, not the cached one."""
+    import asyncio
+    from cvx_agent import agents, semcache
+
+    async def embed(text):
+        return [1.0, 0.0]
+
+    async def extract(model_name):
+        return {"title": "Engineer", "job-posting": "https://old/job"}
+
+    monkeypatch.setattr(semcache, "ENABLED", True)
+    monkeypatch.setattr(semcache, "embed", embed)
+    monkeypatch.setattr(agents, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(agents, "SEMANTIC_CACHE", semcache.SemanticCache(tmp_path / "semcache.json"))
+    monkeypatch.setattr(agents, "run_with_fallback", lambda action_fn: action_fn("test"))
+
+    first = {"job_text": "Python engineer", "url": "https://old/job"}
+    repost = {"job_text": "Python engineer!", "url": "https://new/job"}
+    asyncio.run(agents.run_cached("extract", first, extract, semantic_field="job_text"))
+    result = asyncio.run(agents.run_cached("extract", repost, None, semantic_field="job_text"))
+
+    assert result == {"title": "Engineer", "job-posting": "https://new/job"}
+
+
+def test_openai_batch_results_map_to_request_order():
+    """Test that batch output is placed by custom_id, with None for failed requests."""
+    from cvx_agent.batch import openai_results, parse_json_output
+
+    assert parse_json_output('```json\n{"title": "Engineer"}\n```') == {"title": "Engineer"}
+
+    def line(custom_id, status_code, content):
+        body = {"choices": [{"message": {"content": content}}]}
+        return json.dumps({"custom_id": custom_id, "response": {"status_code": status_code, "body": body}})
+
+    output = "\n".join([
+        line("2", 200, '{"title": "Third"}'),
+        line("0", 200, '{"title": "First"}'),
+        line("1", 500, ""),
+        line("3", 200, "not json"),
+    ])
+    assert openai_results(output, 4) == [{"title": "First"}, None, {"title": "Third"}, None]
+
+
+def test_daemon_framing_and_commands(tmp_path):
+    """Test the daemon's length-prefixed framing and its status/stop commands."""
+    import asyncio
+    import os
+    import struct
+    from cvx_agent import daemon
+
+    async def scenario():
+        server_daemon = daemon.Daemon(tmp_path / "agent.sock")
+        server = await asyncio.start_unix_server(server_daemon.handle_connection, path=str(server_daemon.path))
+        async with server:
+            # Raw frame: 4-byte big-endian length, then JSON
+            reader, writer = await asyncio.open_unix_connection(str(server_daemon.path))
+            payload = json.dumps({"command": "status"}).encode()
+            writer.write(struct.pack(">I", len(payload)) + payload)
+            (length,) = struct.unpack(">I", await reader.readexactly(4))
+            status = json.loads(await reader.readexactly(length))
+            writer.close()
+
+            unknown = await daemon.send_request({"command": "restart"}, server_daemon.path)
+            assert not server_daemon.stopped.is_set()
+            stop = await daemon.send_request({"command": "stop"}, server_daemon.path)
+            await asyncio.wait_for(server_daemon.stopped.wait(), timeout=1)
+        return status, unknown, stop
+
+    status, unknown, stop = asyncio.run(scenario())
+    assert status == {"ok": True, "result": {"pid": os.getpid(), "socket": str(tmp_path / "agent.sock")}}
+    assert unknown == {"ok": False, "error": "Unknown command: restart"}
+    assert stop == {"ok": True, "result": None}
+
+
+def test_gather_bounded_cancels_siblings_on_failure():
+    """Test that a failing item cancels the rest of the batch instead of orphaning it."""
+    import asyncio
+    from cvx_agent.agents import gather_bounded
+
+    cancelled = []
+
+    async def slow(i):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+
+    async def fail():
+        raise ValueError("bad item")
+
+    async def scenario():
+        with pytest.raises(ValueError, match="bad item"):
+            await gather_bounded([slow(0), fail(), slow(2), slow(3)], max_concurrency=2)
+        assert not [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+    asyncio.run(scenario())
+    assert 0 in cancelled
+
+
+def test_daemon_reloads_models_regenerated_after_startup(tmp_path, monkeypatch):
+    """Test that the first request after a models.py rewrite uses the new Model."""
+    import asyncio
+    import importlib
+    import os
+    from cvx_agent import agents, daemon, http, models
+
+    class FakeClient:
+        async def aclose(self):
+            pass
+
+    async def dispatch_one(item):
+        return item
+
+    reloaded = []
+    models_file = tmp_path / "models.py"
+    models_file.write_text("")
+    monkeypatch.setattr(models, "__file__", str(models_file))
+    monkeypatch.setattr(importlib, "reload", lambda module: reloaded.append(module) or module)
+    monkeypatch.setattr(agents, "warmup", lambda: None)
+    monkeypatch.setattr(agents, "dispatch_one", dispatch_one)
+    monkeypatch.setattr(http, "shared_client", FakeClient)
+
+    async def scenario():
+        server_daemon = daemon.Daemon(tmp_path / "agent.sock")
+        serving = asyncio.create_task(server_daemon.serve())
+        while not server_daemon.path.exists():
+            await asyncio.sleep(0.01)
+
+        # cvx regenerates models.py for the project schema, then sends the build
+        st = os.stat(models_file)
+        os.utime(models_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        response = await daemon.send_request({"input": {"action": "build"}}, server_daemon.path)
+
+        await daemon.send_request({"command": "stop"}, server_daemon.path)
+        await serving
+        return response
+
+    assert asyncio.run(scenario()) == {"ok": True, "result": {"action": "build"}}
+    assert reloaded == [models]
+
+
+def test_build_compresses_input_once_per_request(sample_input, tmp_path, monkeypatch):
+    """Test that a retried build compresses its input once, not on every attempt."""
+    from cvx_agent import agents
+
+    compressed = []
+
+    async def build_split(model_name, input_data):
+        if model_name == "first":
+            raise RuntimeError("transient")
+        return {"cv": {}, "letter": {}}
+
+    async def run_with_fallback(action_fn):
+        try:
+            return await action_fn("first")
+        except RuntimeError:
+            return await action_fn("second")
+
+    monkeypatch.setattr(agents, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(agents, "SPLIT_BUILD", True)
+    monkeypatch.setattr(agents, "build_split", build_split)
+    monkeypatch.setattr(agents, "run_with_fallback", run_with_fallback)
+    monkeypatch.setattr(agents, "compress_build_input", lambda data: compressed.append(data) or data)
+
+    assert build_cv_and_letter(sample_input) == {"cv": {}, "letter": {}}
+    assert build_cv_and_letter(sample_input) == {"cv": {}, "letter": {}}  # cache hit
+    assert compressed == [sample_input]
@@ -2,12 +2,102 @@ package cmd
 
 import (
 	"bytes"
+	"encoding/binary"
 	"encoding/json"
+	"errors"
 	"fmt"
+	"io"
+	"math"
+	"net"
 	"os"
 	"os/exec"
+	"path/filepath"
+	"time"
 )
 
+// errNoDaemon is returned when no agent daemon is reachable.
+var errNoDaemon = errors.New("agent daemon not running")
+
+// agentDaemonTimeout bounds a whole daemon request, so a hung daemon cannot hang cvx.
+// Generous because a build with retries and fallback can take several minutes.
+const agentDaemonTimeout = 15 * time.Minute
+
+// agentSocketPath returns the Unix socket used by `cvx-agent start`.
+// Must match SOCKET_PATH in agent/cvx_agent/daemon.py.
+func agentSocketPath() string {
+	if path := os.Getenv("CVX_AGENT_SOCKET"); path != "" {
+		return path
+	}
+	dir := os.Getenv("XDG_RUNTIME_DIR")
+	if dir == "" {
+		dir = os.TempDir()
+	}
+	return filepath.Join(dir, "cvx-agent.sock")
+}
+
+// callAgentDaemon sends a request to a running agent daemon.
+// Messages are a 4-byte big-endian length followed by JSON.
+// Returns errNoDaemon if the daemon cannot be reached, so callers can fall back to a subprocess.
+func callAgentDaemon(inputJSON []byte) (map[string]interface{}, error) {
+	conn, err := net.DialTimeout("unix", agentSocketPath(), 200*time.Millisecond)
+	if err != nil {
+		return nil, errNoDaemon
+	}
+	defer func() { _ = conn.Close() }()
+	if err := conn.SetDeadline(time.Now().Add(agentDaemonTimeout)); err != nil {
+		return nil, errNoDaemon
+	}
+
+	request, err := json.Marshal(map[string]interface{}{
+		"input": json.RawMessage(inputJSON),
+		"model": os.Getenv("AI_MODEL"),
+	})
+	if err != nil {
+		return nil, fmt.Errorf("failed to marshal daemon request: %w", err)
+	}
+	if len(request) > math.MaxUint32 {
+		return nil, fmt.Errorf("daemon request too large: %d bytes", len(request))
+	}
+
+	header := make([]byte, 4)
+	binary.BigEndian.PutUint32(header, uint32(len(request)))
+	if _, err := conn.Write(append(header, request...)); err != nil {
+		return nil, errNoDaemon
+	}
+
+	if _, err := io.ReadFull(conn, header); err != nil {
+		return nil, daemonReadError(err)
+	}
+	payload := make([]byte, binary.BigEndian.Uint32(header))
+	if _, err := io.ReadFull(conn, payload); err != nil {
+		return nil, daemonReadError(err)
+	}
+
+	var response struct {
+		OK     bool                   `json:"ok"`
+		Result map[string]interface{} `json:"result"`
+		Error  string                 `json:"error"`
+	}
+	if err := json.Unmarshal(payload, &response); err != nil {
+		return nil, fmt.Errorf("failed to parse daemon response: %w\noutput: %s", err, string(payload))
+	}
+	if !response.OK {
+		return nil, fmt.Errorf("agent failed: %s", response.Error)
+	}
+
+	return response.Result, nil
+}
+
+// daemonReadError maps a failed read of the daemon response to an error.
+// A timeout is reported as is: the daemon accepted the request, so retrying it
+// in a subprocess would repeat the work. Anything else falls back to a subprocess.
+func daemonReadError(err error) error {
+	if errors.Is(err, os.ErrDeadlineExceeded) {
+		return fmt.Errorf("agent daemon did not respond within %s", agentDaemonTimeout)
+	}
+	return errNoDaemon
+}
+
 // callAgentGeneric calls the agent with an action and input data.
 // This is the unified interface for all AI operations.
 func callAgentGeneric(action string, input map[string]interface{}, schemaPath string) (map[string]interface{}, error) {
@@ -35,6 +125,11 @@ func callAgentGeneric(action string, input map[string]interface{}, schemaPath st
 		return nil, fmt.Errorf("failed to marshal input: %w", err)
 	}
 
+	// Use the agent daemon if one is running, otherwise fall back to a subprocess
+	if output, err := callAgentDaemon(inputJSON); !errors.Is(err, errNoDaemon) {
+		return output, err
+	}
+
 	// Call agent via uvx
 	cmd := exec.Command("uvx", "--from", agentDir, "cvx-agent")
 	cmd.Stdin = bytes.NewReader(inputJSON)
@@ -4,6 +4,7 @@ import (
 	"bytes"
 	"crypto/sha256"
 	"encoding/json"
+	"errors"
 	"fmt"
 	"io/fs"
 	"os"
@@ -606,6 +607,19 @@ func callAgent(jobPosting string, cv, letter map[string]interface{}, schemaPath
 		return nil, nil, fmt.Errorf("failed to marshal input: %w", err)
 	}
 
+	// Use the agent daemon if one is running, otherwise fall back to a subprocess
+	if output, err := callAgentDaemon(inputJSON); !errors.Is(err, errNoDaemon) {
+		if err != nil {
+			return nil, nil, err
+		}
+		cvOut, _ = output["cv"].(map[string]interface{})
+		letterOut, _ = output["letter"].(map[string]interface{})
+		if cvOut == nil || letterOut == nil {
+			return nil, nil, fmt.Errorf("invalid output: missing cv or letter fields (cv=%v, letter=%v)", cvOut == nil, letterOut == nil)
+		}
+		return cvOut, letterOut, nil
+	}
+
 	// Call agent via uvx
 	cmd := exec.Command("uvx", "--from", agentDir, "cvx-agent")
 	cmd.Stdin = bytes.NewReader(inputJSON)